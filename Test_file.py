@@ -1,13 +1,20 @@
 import Current_module as cc
 import time as t
+import logging
+import os
 
-cc.setup_instruments()
+logging.basicConfig(level=os.environ.get('LOGLEVEL', 'INFO').upper(), format="%(message)s")
 
-cc.run_at_voltage(cc.psu, cc.dmm, 3)
+psu, dmm = cc.setup_instruments()
+if psu is None:
+    print("STOP TESTING...")
+    exit()
+
+cc.run_at_voltage(psu, dmm, 3)
 
 t.sleep(2)
 
-cc.run_at_voltage(cc.psu, cc.dmm, 2.5)
+cc.run_at_voltage(psu, dmm, 2.5)
 
 
 
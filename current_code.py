@@ -1,109 +1,163 @@
 import pyvisa
 import time
 import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
 import os 
+import logging
+import csv
+import re
+import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+log = logging.getLogger(__name__)
+
+# one ResourceManager per process, created on first use
+_RM = None
+
+def _get_rm():
+    global _RM
+    if _RM is None:
+        _RM = pyvisa.ResourceManager()
+    return _RM
+
+# open one instrument and run its init commands; all I/O stays in the worker thread
+def _open(rm, addr, init_cmds=()):
+    inst = rm.open_resource(addr)
+    inst.timeout = 3000  # Reduced timeout to 3 seconds
+    idn = inst.query("*IDN?")
+    for cmd in init_cmds:
+        inst.write(cmd)
+    return inst, idn
 
 #set up instruments
 def setup_instruments():
-    rm = pyvisa.ResourceManager()
+    rm = _get_rm()
     
     # Updated addresses based on your system
     dmm_addr = 'USB0::0x0957::0x0607::my47026696::0::INSTR'
     psu_addr = 'USB0::0x1AB1::0x0E11::dp8c163452166::0::INSTR'
     
     available_resources = rm.list_resources()
-    print(f"🔍 Available VISA resources: {available_resources}")
+    log.info("🔍 Available VISA resources: %s", available_resources)
 
-    # Open and test DMM first with faster timeouts
+    # Open DMM and PSU in parallel instead of one after the other
     dmm = None
-    if dmm_addr in available_resources:
-        try:
-            dmm = rm.open_resource(dmm_addr)
-            dmm.timeout = 3000  # Reduced timeout to 3 seconds
-            time.sleep(0.2)  # Reduced wait time
-            print("DMM ID:", dmm.query("*IDN?"))
-            # Quick reset
-            dmm.write("*CLS")
-        except Exception as e:
-            print(f"❌ DMM connection failed: {e}")
-            dmm = None
-    else:
-        print(f"❌ DMM not found in available resources: {dmm_addr}")
+    psu = None
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = {}
+        if dmm_addr in available_resources:
+            futures[pool.submit(_open, rm, dmm_addr, ["*CLS"])] = "DMM"
+        else:
+            log.warning("❌ DMM not found in available resources: %s", dmm_addr)
 
-    time.sleep(0.5)  # Reduced wait time
+        if psu_addr in available_resources:
+            psu_init = ["*CLS", ":INST CH1", ":OUTP OFF", ":VOLT 0"]
+            futures[pool.submit(_open, rm, psu_addr, psu_init)] = "PSU"
+        else:
+            log.warning("⚠️ Power Supply not found in available resources: %s", psu_addr)
+            log.warning("💡 Check if PSU is connected and powered on")
 
-    # Now open PSU with faster connection
-    psu = None
-    if psu_addr in available_resources:
-        try:
-            psu = rm.open_resource(psu_addr)
-            psu.timeout = 3000  # Reduced timeout to 3 seconds
-            time.sleep(0.2)  # Reduced wait time
-            print("Power Supply ID:", psu.query("*IDN?"))
-            
-            # Quick initialization
-            psu.write("*CLS")
-            psu.write(":INST CH1")
-            psu.write(":OUTP OFF")
-            psu.write(":VOLT 0")
-            time.sleep(0.2)  # Reduced wait time
-            
-        except Exception as e:
-            print(f"⚠️ Power Supply connection failed: {e}")
-            psu = None
-    else:
-        print(f"⚠️ Power Supply not found in available resources: {psu_addr}")
-        print("💡 Check if PSU is connected and powered on")
+        for future in as_completed(futures):
+            if futures[future] == "DMM":
+                try:
+                    dmm, idn = future.result()
+                    log.info("DMM ID: %s", idn)
+                except Exception as e:
+                    log.error("❌ DMM connection failed: %s", e)
+                    dmm = None
+            else:
+                try:
+                    psu, idn = future.result()
+                    log.info("Power Supply ID: %s", idn)
+                except Exception as e:
+                    log.error("⚠️ Power Supply connection failed: %s", e)
+                    psu = None
 
     return psu, dmm
 
 
-def run_test(psu, dmm, voltage, label="Standard", nplc=0.1, sample_count=100):
-    psu.write(":INST CH1")
-    psu.write(f":VOLT {voltage:.2f}")
-    psu.write(":OUTP ON")  # Turn on the power supply output
-    print(f"\n Running '{label}' test at {voltage} V...")
+# parse an ASCII reading CSV straight into a numpy array
+def parse_readings(raw_data):
+    raw_data = raw_data.strip()
+    try:
+        # fromstring only warns on trailing junk, so make that an error too
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            return np.fromstring(raw_data, sep=',', dtype=np.float64)
+    except (ValueError, DeprecationWarning):
+        # Fall back to pulling out anything that looks like a number
+        log.warning("⚠️ Unexpected data format, cleaning: %.50s", raw_data)
+        values = re.findall(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?', raw_data)
+        return np.array(values, dtype=np.float64)
+
+# DMM state unknown (e.g. after an error), so the next configure_dmm starts from scratch.
+# An ASCII fallback is kept: the meter rejected REAL,64 and will again.
+def _reset_dmm_cfg(dmm):
+    cfg = getattr(dmm, "_last_cfg", {})
+    dmm._last_cfg = {k: v for k, v in cfg.items() if k == ":FORM:DATA"}
+
+# configure the DMM for a DC current burst; :READ? starts it.
+# The last settings written are kept on dmm._last_cfg so repeat tests only send what changed.
+def configure_dmm(dmm, nplc, sample_count, current_range, sample_interval=None):
+    cfg = getattr(dmm, "_last_cfg", {})
+    cmds = ["*CLS"]
+    if ":CONF" not in cfg:
+        # CONF resets range/NPLC, so only send it the first time
+        cmds += [":CONF:CURR:DC", ":TRIG:SOUR IMM"]
+
+    # REAL,64 = binary block instead of ASCII text, unless fetch_readings already fell back to ASCII.
+    # A fixed range stops the DMM from autoranging on every trigger
+    wanted = {
+        ":FORM:DATA": cfg.get(":FORM:DATA", "REAL,64"),
+        ":CURR:DC:RANG": current_range,
+        ":CURR:DC:NPLC": nplc,
+        ":SAMP:SOUR": "TIM" if sample_interval else "IMM",  # TIM paces samples every sample_interval s
+        ":SAMP:COUN": sample_count,
+    }
+    if sample_interval:
+        wanted[":SAMP:TIM"] = sample_interval
+    new_cfg = dict(cfg)
+    new_cfg[":CONF"] = "CURR:DC"
+    for cmd, value in wanted.items():
+        if cfg.get(cmd) != value:
+            cmds.append(f"{cmd} {value}")
+            new_cfg[cmd] = value
+
+    dmm.write(";".join(cmds))
+    dmm._last_cfg = new_cfg  # Only cache what the DMM actually accepted
+
+# trigger and read in one transaction as an IEEE-488.2 REAL,64 block, falling back to ASCII
+def fetch_readings(dmm, cmd=":READ?"):
+    cfg = getattr(dmm, "_last_cfg", {})
+    if cfg.get(":FORM:DATA") == "ASCII":
+        return parse_readings(dmm.query(cmd))
 
     try:
-        dmm.timeout = int(sample_count * nplc * 1000 * 2)  # Reduced timeout calculation
-        dmm.write("*CLS")
-        dmm.write(":CONF:CURR:DC")
-
-        dmm.write(f":CURR:DC:NPLC {nplc}")  # Reduced NPLC for faster measurement
-        dmm.write(f":SAMP:COUN {sample_count}")  # Reduced sample count
-
-        dmm.write(":TRIG:SOUR IMM")
-        dmm.write(":INIT")
-
-        print(f" DMM initialized for {sample_count} samples, waiting...")
-        time.sleep(sample_count * 0.01)  # Reduced wait time per sample
-
-        raw_data = dmm.query(":FETC?")
-        
-        # Clean the data - remove any extra text and split properly
-        raw_data = raw_data.strip()
-        if ',' in raw_data:
-            # Split by comma and clean each value
-            readings = []
-            for value in raw_data.split(','):
-                try:
-                    # Remove any non-numeric characters except decimal point, minus, and E
-                    clean_value = ''.join(c for c in value if c.isdigit() or c in '.-Ee')
-                    if clean_value:
-                        readings.append(float(clean_value))
-                except ValueError:
-                    print(f"⚠️ Skipping invalid value: {value}")
-                    continue
-        else:
-            # Single value
-            try:
-                clean_value = ''.join(c for c in raw_data if c.isdigit() or c in '.-Ee')
-                readings = [float(clean_value)] if clean_value else []
-            except ValueError:
-                print(f"⚠️ Invalid single value: {raw_data}")
-                readings = []
+        # Keysight DMMs send big-endian doubles unless FORM:BORD SWAP is set
+        return dmm.query_binary_values(cmd, datatype='d', container=np.ndarray, is_big_endian=True)
+    except ValueError as e:
+        # Reply was not a REAL,64 block. VISA errors such as timeouts are not retried and propagate
+        log.error("⚠️ Binary fetch failed (%s), switching DMM to ASCII...", e)
+        dmm.clear()
+        dmm.write(":FORM:DATA ASCII")
+        new_cfg = dict(cfg)
+        new_cfg[":FORM:DATA"] = "ASCII"  # Sticks, so later tests go straight to ASCII
+        dmm._last_cfg = new_cfg
+        # Re-read the reading memory; resending :READ? would run the whole acquisition again
+        return parse_readings(dmm.query(":FETC?"))
+
+# current_range in A: 0.1 keeps ~10x the resolution of the 1 A range for mA-level beeps.
+# Raise it for transmitters that draw more than 100 mA or the DMM will overload.
+def run_test(psu, dmm, voltage, label="Standard", nplc=0.1, sample_count=100, current_range=0.1):
+    # One message per instrument; SCPI runs ';'-separated commands in order
+    psu.write(f":INST CH1;:VOLT {voltage:.2f};:OUTP ON")  # Turn on the power supply output
+    log.info("\n Running '%s' test at %s V...", label, voltage)
+
+    try:
+        dmm.timeout = int(sample_count * nplc * 1000 * 3 + 2000)  # :READ? blocks for the whole acquisition
+        configure_dmm(dmm, nplc, sample_count, current_range)
+
+        log.debug(" DMM configured for %d samples, reading...", sample_count)
+        readings = fetch_readings(dmm)  # :READ? = INIT + FETC? in one round-trip
 
         return {
             "label": label,
@@ -112,7 +166,8 @@ def run_test(psu, dmm, voltage, label="Standard", nplc=0.1, sample_count=100):
         }
 
     except Exception as e:
-        print(f" Error during measurement: {e}")
+        log.error(" Error during measurement: %s", e)
+        _reset_dmm_cfg(dmm)
         return {
             "label": label,
             "voltage": voltage,
@@ -121,36 +176,38 @@ def run_test(psu, dmm, voltage, label="Standard", nplc=0.1, sample_count=100):
 
 def detect_beep(readings, label, threshold=0.005, min_gap=10):
     # Lowered threshold from 0.02 to 0.005 → detects ~5 mA spikes
-    above = np.array(readings) > threshold
-    spike_indices = []
-    i = 0
-    while i < len(above):
-        if above[i]:
-            spike_indices.append(i)
-            i += min_gap
-        else:
-            i += 1
-
-    num_spikes = len(spike_indices)
+    mask = np.asarray(readings) > threshold
+    # Count rising edges, so a beep spanning many samples is one spike
+    rising = np.flatnonzero(np.diff(mask.astype(np.int8)) == 1) + 1
+    if mask.size and mask[0]:
+        rising = np.concatenate(([0], rising))
+    if rising.size:
+        # Edges closer than min_gap to the previous one are ringing on the same beep
+        keep = np.concatenate(([True], np.diff(rising) >= min_gap))
+        num_spikes = int(keep.sum())
+    else:
+        num_spikes = 0
 
-    print(f"📊 {label}: Detected {num_spikes} spike(s)")
+    log.info("📊 %s: Detected %d spike(s)", label, num_spikes)
 
     if label == "Double Beep":
         detected = num_spikes >= 2
-        print("✅ Double Beep Detected!" if detected else "❌ Double Beep NOT detected.")
+        log.info("✅ Double Beep Detected!" if detected else "❌ Double Beep NOT detected.")
         return detected
 
     if label == "Triple Beep":
         detected = num_spikes >= 3
-        print("✅ Triple Beep Detected!" if detected else "❌ Triple Beep NOT detected.")
+        log.info("✅ Triple Beep Detected!" if detected else "❌ Triple Beep NOT detected.")
         return detected
 
 # plot results 
 def plot_results(results):
+    import matplotlib.pyplot as plt  # Imported here so runs that never plot skip the cost
+
     plt.figure(figsize=(10, 6))
     for res in results:
-        t = [i * (1/1000) for i in range(len(res['readings']))]
-        y = [x * 1000 for x in res['readings']]
+        y = np.asarray(res['readings']) * 1000.0
+        t = np.arange(y.size) * 1e-3
         plt.plot(t, y, label=f"{res['label']} ({res['voltage']} V)")
     plt.xlabel("Time (s)")
     plt.ylabel("Current (mA)")
@@ -162,37 +219,42 @@ def plot_results(results):
 
 #export to csv
 def export_summary_to_csv(voltage_main, max_current, double_detected, triple_detected, filename="summary_results.csv"):
-    summary_row = {
-        "Voltage (V)": voltage_main,
-        "Max Current (mA)": round(max_current * 1000, 3),
-        "Double Beep": "PASS" if double_detected else "FAIL",
-        "Triple Beep": "PASS" if triple_detected else "FAIL"
-    }
+    header = ["Voltage (V)", "Max Current (mA)", "Double Beep", "Triple Beep"]
+    summary_row = [
+        voltage_main,
+        round(max_current * 1000, 3),
+        "PASS" if double_detected else "FAIL",
+        "PASS" if triple_detected else "FAIL"
+    ]
 
     file_exists = os.path.isfile(filename)
 
-    df = pd.DataFrame([summary_row])
-    df.to_csv(filename, mode='a', header=not file_exists, index=False)
+    with open(filename, 'a', newline='') as f:
+        writer = csv.writer(f)
+        if not file_exists:
+            writer.writerow(header)
+        writer.writerow(summary_row)
 
-    print(f"\n📄 Summary appended to '{os.path.abspath(filename)}'")
+    log.info("\n📄 Summary appended to '%s'", os.path.abspath(filename))
 
 def run_beep_sequence(psu, dmm, v_main, v_double, v_triple):
     if psu is None:
-        print("❌ Cannot run test — Power Supply not connected.")
+        log.warning("❌ Cannot run test — Power Supply not connected.")
         return
 
     psu.write(":OUTP ON")
 
     result_main = run_test(psu, dmm, v_main, label="Main Test")
-    r = result_main['readings']
-    max_current = max(r) if r else 0
+    arr = np.asarray(result_main['readings'])
 
-    if not r:
-        print("❌ No current readings collected. Skipping analysis.")
+    if arr.size == 0:
+        log.warning("❌ No current readings collected. Skipping analysis.")
         return
 
-    print(f"\n Main Test ({v_main} V):")
-    print(f"Min: {min(r)*1000:.3f} mA | Max: {max(r)*1000:.3f} mA | Avg: {sum(r)/len(r)*1000:.3f} mA")
+    max_current = arr.max()
+
+    log.info("\n Main Test (%s V):", v_main)
+    log.info("Min: %.3f mA | Max: %.3f mA | Avg: %.3f mA", arr.min()*1000, max_current*1000, arr.mean()*1000)
 
     result_double = run_test(psu, dmm, v_double, label="Double Beep")
     double_detected = detect_beep(result_double['readings'], "Double Beep")
@@ -203,14 +265,44 @@ def run_beep_sequence(psu, dmm, v_main, v_double, v_triple):
 
     plot_results([result_main, result_double, result_triple])
 
+def run_at_voltage(psu, dmm, voltage, duration=3, nplc=0.1, current_range=0.1):
+    psu.write(f":INST CH1;:VOLT {voltage:.2f};:OUTP ON")  # Turn on the power supply output
+    start = time.monotonic()
+    log.info("\n Running test at %s V...", voltage)
+
+    readings = []
+    try:
+        if dmm is not None:
+            # Measure during the dwell instead of sleeping through it. Samples are paced by the
+            # DMM's timer at 3x the 50 Hz integration time, which leaves room for autozero and
+            # NPLC rounding, so the burst ends within the dwell
+            sample_interval = max(nplc * 0.02 * 3, 0.01)
+            sample_count = max(1, int(duration / sample_interval))
+            dmm.timeout = int(duration * 1000 * 2 + 2000)
+            configure_dmm(dmm, nplc, sample_count, current_range, sample_interval)
+            readings = fetch_readings(dmm)  # Returns once the dwell's worth of samples is in
+    except Exception as e:
+        log.error(" Error during measurement: %s", e)
+        if dmm is not None:
+            _reset_dmm_cfg(dmm)
+    finally:
+        # Hold the voltage for the full dwell even if the DMM finished early or failed
+        time.sleep(max(0, duration - (time.monotonic() - start)))
+        psu.write(":OUTP OFF")
+        log.info("Power supply turned off")
+
+    return readings
+
 def main():
+    # LOGLEVEL=WARNING silences the per-test chatter
+    logging.basicConfig(level=os.environ.get('LOGLEVEL', 'INFO').upper(), format="%(message)s")
     psu = None
     dmm = None
     try:
         psu, dmm = setup_instruments()
 
         if dmm is None:
-            print("❌ DMM not available — skipping tests.")
+            log.warning("❌ DMM not available — skipping tests.")
             return
 
         print("\n Enter test voltages for automated run:")
@@ -221,22 +313,22 @@ def main():
         run_beep_sequence(psu, dmm, v_main, v_double, v_triple)
 
     except ValueError:
-        print(" Invalid input. Please enter numeric voltages.")
+        log.warning(" Invalid input. Please enter numeric voltages.")
 
     except Exception as e:
-        print(f" Error: {e}")
+        log.error(" Error: %s", e)
 
     finally:
-        print("\n🔌 Closing instrument connections...")
+        log.info("\n🔌 Closing instrument connections...")
         try:
             if dmm:
                 dmm.close()
-                print("✅ DMM closed.")
+                log.info("✅ DMM closed.")
             if psu:
                 psu.close()
-                print("✅ PSU closed.")
+                log.info("✅ PSU closed.")
         except Exception as e:
-            print(f"⚠️ Error during close: {e}")
+            log.error("⚠️ Error during close: %s", e)
 
 
 if __name__ == "__main__":